@@ -2,12 +2,40 @@ import datetime
 import click
 from pathlib import Path
 import csv
-from expense_tracker.generate_report import generate_report, get_current_month
+import os
+import shlex
+import tempfile
+from expense_tracker.cube import (
+    DIMENSIONS,
+    format_pivot,
+    pivot,
+    plot_trend_chart,
+    slice_cube,
+    update_cube,
+)
+from expense_tracker.currency import (
+    BASE_CURRENCY,
+    FX_RATES_FILE,
+    load_fx_rates,
+    lookup_rate,
+)
+from expense_tracker.generate_report import (
+    DEFAULT_CHART_OPTIONS,
+    DEFAULT_MAX_WORKERS,
+    generate_overview_report,
+    generate_report,
+    get_current_month,
+    load_months_data,
+    report_chart_sizes,
+    update_reports_readme,
+)
 
 DATA_DIR = Path("data")
 
-# Get the current date in YYYY-MM-DD format
-current_date = datetime.datetime.now().strftime("%Y-%m-%d")
+
+def get_current_date():
+    # Returns the current date in YYYY-MM-DD format
+    return datetime.datetime.now().strftime("%Y-%m-%d")
 
 
 def get_month_from_date(date_str):
@@ -19,15 +47,62 @@ def ensure_data_dir():
     DATA_DIR.mkdir(exist_ok=True)
 
 
+def check_fx_rate(currency, date_str):
+    # Refuses amounts in a currency without a rate on or before the date, as
+    # they would make every later report fail
+    if currency.upper() == BASE_CURRENCY:
+        return
+    fx_file = DATA_DIR / FX_RATES_FILE.name
+    try:
+        lookup_rate(load_fx_rates(fx_file), currency.upper(), date_str)
+    except ValueError as e:
+        raise click.ClickException(f"{e} in {fx_file}; add a rate first")
+
+
 def append_row_to_csv(file_path, fieldnames, row):
     file_exists = file_path.exists()
+    if file_exists:
+        # Keep the existing column layout; add any new columns (e.g. Currency)
+        with file_path.open(newline="") as f:
+            reader = csv.DictReader(f)
+            existing_fieldnames = list(reader.fieldnames or [])
+            missing = [n for n in fieldnames if n not in existing_fieldnames]
+            existing_rows = []
+            for existing_row in reader:
+                if missing and None in existing_row:
+                    raise click.ClickException(
+                        f"{file_path} line {reader.line_num} has more fields than "
+                        f"its header; fix it before adding the column(s) "
+                        f"{', '.join(missing)}"
+                    )
+                existing_rows.append(existing_row)
+        fieldnames = existing_fieldnames + missing
+        if missing:
+            rewrite_csv(file_path, fieldnames, existing_rows + [row])
+            return
     with file_path.open("a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
         if not file_exists:
             writer.writeheader()
         writer.writerow(row)
 
 
+def rewrite_csv(file_path, fieldnames, rows):
+    # Writes to a temporary file next to file_path and then replaces it, so the
+    # original is left intact if anything goes wrong
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.chmod(tmp_name, file_path.stat().st_mode)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
 @click.group()
 def cli():
     """Expense Tracker CLI"""
@@ -39,12 +114,15 @@ def cli():
 @click.option("--category", help="Expense category (e.g. Rent, Groceries)")
 @click.option("--paid-by", required=True, help="Who paid (Alice, Bob, or Both)")
 @click.option("--amount", required=True, type=float, help="Amount of the expense")
+@click.option(
+    "--currency", help="Currency of the amount (e.g. EUR), if not the base currency"
+)
 @click.option("--notes", required=True, help="Notes")
-def add_expense(date, category, paid_by, amount, notes):
+def add_expense(date, category, paid_by, amount, currency, notes):
     """Add a shared expense to the monthly CSV file."""
     ensure_data_dir()
     if date is None:
-        date_val = current_date
+        date_val = get_current_date()
     else:
         date_val = date
     if category is None:
@@ -61,6 +139,10 @@ def add_expense(date, category, paid_by, amount, notes):
         "Notes": notes,
     }
     fieldnames = ["Date", "Category", "Paid By", "Amount", "Notes"]
+    if currency:
+        check_fx_rate(currency, date_val)
+        row["Currency"] = currency.upper()
+        fieldnames.insert(4, "Currency")
     append_row_to_csv(file_path, fieldnames, row)
     click.echo(f"✅ Expense added to {file_path}")
     click.echo(f"Rows: {row}")
@@ -70,14 +152,17 @@ def add_expense(date, category, paid_by, amount, notes):
 @click.option("--date", help="Date of the contribution (YYYY-MM-DD)")
 @click.option("--name", required=True, help="Contributor's name (Alice or Bob)")
 @click.option("--amount", required=True, type=float, help="Amount contributed")
+@click.option(
+    "--currency", help="Currency of the amount (e.g. EUR), if not the base currency"
+)
 @click.option("--virtual", is_flag=True, help="Is this a virtual contribution?")
 @click.option("--notes", help="Optional notes")
-def add_contribution(date, name, amount, virtual, notes):
+def add_contribution(date, name, amount, currency, virtual, notes):
     """Add a contribution (real or virtual) to the monthly contributions CSV file."""
     ensure_data_dir()
     # If called with only --name and --amount, fill in defaults and do not prompt
     if date is None:
-        date_val = current_date
+        date_val = get_current_date()
     else:
         date_val = date
     if notes is None:
@@ -95,6 +180,10 @@ def add_contribution(date, name, amount, virtual, notes):
         "Notes": notes_val,
     }
     fieldnames = ["Date", "Name", "Amount", "Virtual Contribution", "Notes"]
+    if currency:
+        check_fx_rate(currency, date_val)
+        row["Currency"] = currency.upper()
+        fieldnames.insert(3, "Currency")
     append_row_to_csv(file_path, fieldnames, row)
     click.echo(f"✅ Contribution added to {file_path}")
     click.echo(f"Rows: {row}")
@@ -102,11 +191,218 @@ def add_contribution(date, name, amount, virtual, notes):
 
 @cli.command()
 @click.argument("month", required=False)
-def report(month):
+@click.option(
+    "--workers",
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of month files read concurrently for the overview",
+)
+@click.option(
+    "--chart-format",
+    type=click.Choice(["png", "svg"]),
+    default=DEFAULT_CHART_OPTIONS["format"],
+    show_default=True,
+    help="File format of the charts",
+)
+@click.option(
+    "--dpi",
+    default=DEFAULT_CHART_OPTIONS["dpi"],
+    show_default=True,
+    type=click.IntRange(min=10),
+    help="Resolution of PNG charts",
+)
+@click.option(
+    "--colors",
+    default=DEFAULT_CHART_OPTIONS["colors"],
+    show_default=True,
+    type=click.IntRange(min=0, max=256),
+    help="Number of palette colors for PNG charts (0 keeps full color)",
+)
+@click.pass_obj
+def report(batch_state, month, workers, chart_format, dpi, colors):
     """Generate the report for a given MONTH (format: YYYY-MM). Defaults to current month."""
     if not month:
         month = get_current_month()
-    generate_report(month)
+    chart_options = {"format": chart_format, "dpi": dpi, "colors": colors}
+    if batch_state is not None:
+        # In batch mode, reports are generated once after all commands have run,
+        # so check now that the month can be reported on
+        csv_file = DATA_DIR / f"{month}.csv"
+        if not csv_file.exists():
+            raise click.ClickException(f"CSV file not found: {csv_file}")
+        # Each month keeps the chart options of its own (last) report line; the
+        # overview uses the last line's options, as if the reports ran in order
+        batch_state["report_months"][month] = chart_options
+        batch_state["workers"] = workers
+        batch_state["chart_options"] = chart_options
+        click.echo(f"⏳ Report for {month} deferred until the end of the batch")
+        return
+    try:
+        generate_report(month, max_workers=workers, chart_options=chart_options)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+def validate_chart_path(ctx, param, value):
+    if value is not None and value.suffix.lower() not in (".png", ".svg"):
+        raise click.BadParameter("chart file must end in .png or .svg")
+    return value
+
+
+@cli.command()
+@click.option(
+    "--category", multiple=True, help="Only include this category (repeatable)"
+)
+@click.option("--payer", multiple=True, help="Only include this payer (repeatable)")
+@click.option(
+    "--month", multiple=True, help="Only include this month, YYYY-MM (repeatable)"
+)
+@click.option(
+    "--rows",
+    type=click.Choice(DIMENSIONS),
+    default="category",
+    show_default=True,
+    help="Dimension shown as table rows",
+)
+@click.option(
+    "--columns",
+    type=click.Choice(DIMENSIONS + ("none",)),
+    default="month",
+    show_default=True,
+    help="Dimension shown as table columns",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["markdown", "csv", "json"]),
+    default="markdown",
+    show_default=True,
+    help="Output format",
+)
+@click.option(
+    "--chart",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    callback=validate_chart_path,
+    help="Also write a category trend chart to this path (.png or .svg)",
+)
+def cube(category, payer, month, rows, columns, fmt, chart):
+    """Show expense totals pivoted by category, month and payer."""
+    if rows == columns:
+        raise click.UsageError("--rows and --columns must differ")
+    try:
+        data_cube = update_cube()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    records = slice_cube(
+        data_cube,
+        categories=set(category) or None,
+        months=set(month) or None,
+        payers=set(payer) or None,
+    )
+    columns_dim = None if columns == "none" else columns
+    row_keys, column_keys, table = pivot(records, rows=rows, columns=columns_dim)
+    click.echo(format_pivot(row_keys, column_keys, table, rows, fmt))
+    if chart:
+        plot_trend_chart(
+            data_cube,
+            chart,
+            categories=set(category) or None,
+            months=set(month) or None,
+            payers=set(payer) or None,
+            chart_options={"format": chart.suffix.lower()[1:]},
+        )
+        click.echo(f"✅ Trend chart written to {chart}")
+        report_chart_sizes()
+
+
+def run_deferred_reports(batch_state):
+    """
+    Generates the reports requested during a batch: each month's report with its
+    own chart options, then the overview (with the options of the last report line)
+    and reports README once. All months are loaded once and shared by the month
+    reports and the overview.
+    """
+    months = batch_state["report_months"]
+    if not months:
+        return
+    workers = batch_state["workers"]
+    chart_options = batch_state["chart_options"]
+    try:
+        months_data = load_months_data(DATA_DIR, workers)
+        by_month = {data["month"]: data for data in months_data}
+        for month, month_chart_options in months.items():
+            generate_report(
+                month,
+                max_workers=workers,
+                update_overview=False,
+                chart_options=month_chart_options,
+                month_data=by_month.get(month),
+            )
+        generate_overview_report(workers, chart_options, months_data)
+        update_reports_readme()
+        report_chart_sizes()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+@cli.command()
+@click.argument("script", type=click.File("r"), default="-")
+@click.pass_context
+def batch(ctx, script):
+    """Run many commands from SCRIPT (or stdin) in one process.
+
+    Each line is a command as given to the CLI, e.g.
+    `add-expense --paid-by Bob --amount 42 --notes Groceries`. Empty lines and
+    lines starting with # are skipped. Report generation is deferred and runs once
+    after the last command. In an interactive shell, errors are reported and the
+    shell continues, and Ctrl-C cancels the current line; otherwise the batch stops
+    at the first failing line.
+    """
+    if ctx.obj is not None:
+        raise click.UsageError("batch cannot be nested")
+    interactive = script.isatty()
+    batch_state = {
+        "report_months": {},
+        "workers": DEFAULT_MAX_WORKERS,
+        "chart_options": None,
+    }
+    prog_name = ctx.find_root().info_name
+    line_number = 0
+    while True:
+        try:
+            if interactive:
+                click.echo("expense-tracker> ", nl=False)
+            line = script.readline()
+            if not line:
+                if interactive:
+                    click.echo()
+                break
+            line_number += 1
+            args = shlex.split(line, comments=True)
+            if args and args[0] in ("exit", "quit"):
+                break
+            if args:
+                cli.main(
+                    args, prog_name=prog_name, standalone_mode=False, obj=batch_state
+                )
+        except (ValueError, click.ClickException) as e:
+            message = e.format_message() if isinstance(e, click.ClickException) else e
+            error = click.ClickException(f"line {line_number}: {message}")
+            if not interactive:
+                raise error
+            error.show()
+        except (KeyboardInterrupt, click.exceptions.Abort):
+            # Ctrl-C cancels the current line; the shell keeps running, and
+            # deferred reports still run on exit
+            if not interactive:
+                raise
+            click.echo("\nCancelled.")
+    run_deferred_reports(batch_state)
+
+
+# Interactive alias: `shell` reads commands from the terminal
+cli.add_command(batch, name="shell")
 
 
 if __name__ == "__main__":
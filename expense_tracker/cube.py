@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+import csv
+import hashlib
+import io
+import json
+from pathlib import Path
+import matplotlib.pyplot as plt
+import seaborn as sns
+from expense_tracker.currency import FX_RATES_FILE
+from expense_tracker.generate_report import (
+    calculate_month_data,
+    row_category,
+    save_chart,
+)
+
+CUBE_FILE = Path("reports/cube.json")
+CUBE_VERSION = 1
+DIMENSIONS = ("category", "month", "payer")
+
+
+def file_digest(path):
+    """
+    Returns the sha256 hex digest of a file's contents.
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def read_month_cells(csv_file, fx_file=FX_RATES_FILE):
+    """
+    Reads a month's expenses CSV file with calculate_month_data, so amounts and
+    categories are the same as in the reports.
+    Returns a dict: {category: {payer: total_amount}}
+    """
+    month = csv_file.stem
+    contrib_file = csv_file.parent / f"{month}-contributions.csv"
+    month_data = calculate_month_data(month, csv_file, contrib_file, fx_file)
+    cells = {}
+    for row, amount in zip(month_data["csv_rows"], month_data["amounts"]):
+        category = row_category(row)
+        payer = row["Paid By"].strip()
+        payers = cells.setdefault(category, {})
+        payers[payer] = payers.get(payer, 0.0) + amount
+    return cells
+
+
+def load_cube(cube_file=CUBE_FILE):
+    """
+    Loads the persisted cube, or returns an empty one if the file is missing
+    or was written by an incompatible version.
+    """
+    if cube_file.exists():
+        with cube_file.open() as f:
+            cube = json.load(f)
+        if cube.get("version") == CUBE_VERSION:
+            return cube
+    return {"version": CUBE_VERSION, "months": {}}
+
+
+def save_cube(cube, cube_file=CUBE_FILE):
+    cube_file.parent.mkdir(parents=True, exist_ok=True)
+    with cube_file.open("w") as f:
+        json.dump(cube, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def update_cube(data_dir=Path("data"), cube_file=CUBE_FILE):
+    """
+    Brings the persisted category x month x payer cube up to date with the month
+    files in data_dir. Only months whose file contents changed since the last
+    update are re-read; months whose file was removed are dropped. All months are
+    re-read if the FX rates file changed.
+    Returns the updated cube.
+    """
+    cube = load_cube(cube_file)
+    fx_file = data_dir / FX_RATES_FILE.name
+    fx_digest = file_digest(fx_file) if fx_file.exists() else None
+    changed = cube.get("fx") != fx_digest
+    if changed:
+        cube["fx"] = fx_digest
+        cube["months"] = {}
+    months = {}
+    for csv_file in sorted(data_dir.glob("2[0-9][0-9][0-9]-[0-9][0-9].csv")):
+        month = csv_file.stem
+        digest = file_digest(csv_file)
+        entry = cube["months"].get(month)
+        if entry is None or entry["source"] != digest:
+            entry = {"source": digest, "cells": read_month_cells(csv_file, fx_file)}
+            changed = True
+        months[month] = entry
+    if changed or months.keys() != cube["months"].keys():
+        cube["months"] = months
+        save_cube(cube, cube_file)
+    return cube
+
+
+def slice_cube(cube, categories=None, months=None, payers=None):
+    """
+    Returns the cube cells matching the given categories, months and payers
+    (None matches everything) as a list of (category, month, payer, amount)
+    tuples in month order.
+    """
+    records = []
+    for month in sorted(cube["months"]):
+        if months is not None and month not in months:
+            continue
+        for category, by_payer in cube["months"][month]["cells"].items():
+            if categories is not None and category not in categories:
+                continue
+            for payer, amount in by_payer.items():
+                if payers is not None and payer not in payers:
+                    continue
+                records.append((category, month, payer, amount))
+    return records
+
+
+def pivot(records, rows="category", columns="month"):
+    """
+    Sums records into a table keyed by the rows and columns dimensions.
+    If columns is None, all amounts of a row are summed into one column.
+    Returns (row_keys, column_keys, table) with table[row][column] = amount.
+    """
+    row_index = DIMENSIONS.index(rows)
+    column_index = DIMENSIONS.index(columns) if columns else None
+    table = {}
+    column_keys = []
+    for record in records:
+        row_key = record[row_index]
+        column_key = record[column_index] if column_index is not None else "Amount"
+        if column_key not in column_keys:
+            column_keys.append(column_key)
+        cells = table.setdefault(row_key, {})
+        cells[column_key] = cells.get(column_key, 0.0) + record[3]
+    row_keys = list(table)
+    if rows == "month":
+        row_keys.sort()
+    if columns == "month":
+        column_keys.sort()
+    return row_keys, column_keys, table
+
+
+def format_pivot(row_keys, column_keys, table, rows, fmt="markdown"):
+    """
+    Renders a pivot table as markdown, csv or json.
+    Markdown and csv output include a Total column and row.
+    """
+    if fmt == "json":
+        return json.dumps(
+            {
+                row: {col: table[row].get(col, 0.0) for col in column_keys}
+                for row in row_keys
+            },
+            indent=2,
+        )
+
+    header = [rows.capitalize()] + list(column_keys) + ["Total"]
+    lines = []
+    column_totals = {col: 0.0 for col in column_keys}
+    for row in row_keys:
+        values = [table[row].get(col, 0.0) for col in column_keys]
+        for col, value in zip(column_keys, values):
+            column_totals[col] += value
+        lines.append([row] + [f"{v:.2f}" for v in values] + [f"{sum(values):.2f}"])
+    totals = [column_totals[col] for col in column_keys]
+    lines.append(["Total"] + [f"{v:.2f}" for v in totals] + [f"{sum(totals):.2f}"])
+
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(lines)
+        return out.getvalue().rstrip("\n")
+
+    out = ["| " + " | ".join(header) + " |"]
+    out.append("|" + "|".join("-" * (len(h) + 2) for h in header) + "|")
+    for line in lines[:-1]:
+        out.append("| " + " | ".join(line) + " |")
+    out.append("| **Total** | " + " | ".join(lines[-1][1:]) + " |")
+    return "\n".join(out)
+
+
+def plot_trend_chart(
+    cube, out_path, categories=None, months=None, payers=None, chart_options=None
+):
+    """
+    Plots spend per category over time as a line chart, one line per category.
+    """
+    records = slice_cube(cube, categories=categories, months=months, payers=payers)
+    row_keys, months, table = pivot(records, rows="category", columns="month")
+    plt.figure(figsize=(10, 5))
+    colors = sns.color_palette("pastel", max(len(row_keys), 1))
+    for color, category in zip(colors, row_keys):
+        plt.plot(
+            months,
+            [table[category].get(m, 0.0) for m in months],
+            marker="o",
+            label=category,
+            color=color,
+        )
+    plt.title("Expenses by Category over Time")
+    plt.ylabel("Amount ($)")
+    plt.xticks(rotation=30, ha="right")
+    if row_keys:
+        plt.legend()
+    plt.tight_layout()
+    save_chart(out_path, chart_options)
+    plt.close()
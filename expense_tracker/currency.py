@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import csv
+from bisect import bisect_right
+from pathlib import Path
+
+# Amounts in any other currency are converted into the base currency
+BASE_CURRENCY = "USD"
+FX_RATES_FILE = Path("data/fx-rates.csv")
+
+# Caches holding one entry per file path, replaced when the file's identity
+# (see file_key) changes, so they do not grow with every edit of a file
+_fx_rates_cache = {}
+_amounts_cache = {}
+
+
+def file_key(path):
+    """
+    Returns a key identifying the current version of a file, or None if it
+    does not exist.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def load_fx_rates(fx_file=FX_RATES_FILE):
+    """
+    Reads an FX rates CSV file with columns: Date,Currency,Rate
+    where Rate is the value of one unit of Currency in the base currency,
+    valid from Date until the next rate for that currency.
+    Returns a dict: {currency: (sorted_dates, rates)}
+    """
+    key = file_key(fx_file)
+    if key is None:
+        return {}
+    cached = _fx_rates_cache.get(key[0])
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    by_currency = {}
+    with fx_file.open() as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            currency = row["Currency"].strip().upper()
+            by_currency.setdefault(currency, []).append(
+                (row["Date"].strip(), float(row["Rate"].strip()))
+            )
+    fx_rates = {}
+    for currency, entries in by_currency.items():
+        entries.sort()
+        fx_rates[currency] = (
+            [date for date, _ in entries],
+            [rate for _, rate in entries],
+        )
+    _fx_rates_cache[key[0]] = (key, fx_rates)
+    return fx_rates
+
+
+def lookup_rate(fx_rates, currency, date):
+    """
+    Returns the most recent rate for currency on or before date (YYYY-MM-DD).
+    """
+    dates, rates = fx_rates.get(currency, ([], []))
+    i = bisect_right(dates, date)
+    if i == 0:
+        raise ValueError(f"No FX rate for {currency} on or before {date}")
+    return rates[i - 1]
+
+
+def convert_amounts(rows, source=None, fx_file=FX_RATES_FILE):
+    """
+    Converts the Amount of each row into the base currency, using the row's
+    optional Currency column (blank means base currency) and Date.
+    The FX rates are only read if a row is in another currency.
+    If source (the file the rows were read from) is given, the result is cached
+    until source or fx_file change.
+    Returns a list of amounts in the same order as rows.
+    """
+    cache_key = None
+    if source is not None:
+        cache_key = (file_key(source), file_key(fx_file))
+        cached = _amounts_cache.get(str(Path(source).resolve()))
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
+    fx_rates = None
+    rates = {}
+    amounts = []
+    for i, row in enumerate(rows):
+        amount = float(row["Amount"].strip())
+        currency = (row.get("Currency") or "").strip().upper()
+        if currency and currency != BASE_CURRENCY:
+            date = row["Date"].strip()[:10]
+            if (currency, date) not in rates:
+                if fx_rates is None:
+                    fx_rates = load_fx_rates(fx_file)
+                try:
+                    rates[(currency, date)] = lookup_rate(fx_rates, currency, date)
+                except ValueError as e:
+                    # Rows start on line 2, after the header
+                    where = f"{source} line {i + 2}" if source else f"row {i + 1}"
+                    raise ValueError(f"{where}: {e} in {fx_file}") from e
+            amount *= rates[(currency, date)]
+        amounts.append(amount)
+
+    if cache_key is not None:
+        _amounts_cache[str(Path(source).resolve())] = (cache_key, amounts)
+    return amounts
@@ -4,13 +4,28 @@ import csv
 import sys
 from pathlib import Path
 import datetime
+import io
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
 import seaborn as sns
+from PIL import Image
+from expense_tracker.currency import FX_RATES_FILE, convert_amounts
 
+# Maximum number of month files read concurrently when building the overview
+DEFAULT_MAX_WORKERS = 8
 
-def read_contributions(contrib_file):
+# Chart output settings. "colors" is the PNG palette size (0 keeps full color).
+DEFAULT_CHART_OPTIONS = {"format": "png", "dpi": 100, "colors": 256}
+
+# (path, default_png_size, written_size) of the charts saved since the last
+# report_chart_sizes() call
+chart_sizes = []
+
+
+def read_contributions(contrib_file, fx_file=FX_RATES_FILE):
     """
     Reads a contributions CSV file with columns: Name,Amount
+    (and optionally Currency, converted into the base currency)
     Returns a dict: {name: total_paid}
     """
     contributions = {}
@@ -18,27 +33,33 @@ def read_contributions(contrib_file):
     if not contrib_file.exists():
         return contributions, virtual_contributions
     with contrib_file.open() as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = row["Name"].strip()
-            amount = float(row["Amount"].strip())
-            virtual = row.get("Virtual Contribution", "No").strip().lower() == "yes"
-            if virtual:
-                virtual_contributions[name] = (
-                    virtual_contributions.get(name, 0.0) + amount
-                )
-            else:
-                contributions[name] = contributions.get(name, 0.0) + amount
+        rows = list(csv.DictReader(f))
+    for row, amount in zip(rows, convert_amounts(rows, contrib_file, fx_file)):
+        name = row["Name"].strip()
+        virtual = row.get("Virtual Contribution", "No").strip().lower() == "yes"
+        if virtual:
+            virtual_contributions[name] = virtual_contributions.get(name, 0.0) + amount
+        else:
+            contributions[name] = contributions.get(name, 0.0) + amount
     return contributions, virtual_contributions
 
 
-def calculate_month_data(month, csv_file, contrib_file):
+def row_category(row):
+    """
+    Returns the category of an expenses CSV row.
+    """
+    return row.get("Category", "UncategorizedYes").strip()
+
+
+def calculate_month_data(month, csv_file, contrib_file, fx_file=FX_RATES_FILE):
     """
     Calculate all relevant data for a given month: contributions, virtual contributions,
     paid_by, balances, etc.
+    Amounts in other currencies are converted into the base currency with the rates
+    in fx_file; the converted amount of each row in csv_rows is in amounts.
     Returns a dict with all relevant fields for reporting.
     """
-    contributions, virtual_contributions = read_contributions(contrib_file)
+    contributions, virtual_contributions = read_contributions(contrib_file, fx_file)
     total_shared = 0.0
     csv_rows = []
     people = set(contributions.keys())
@@ -49,7 +70,9 @@ def calculate_month_data(month, csv_file, contrib_file):
         for row in reader:
             csv_rows.append(dict(row))
             people.add(row["Paid By"].strip())
-            total_shared += float(row["Amount"].strip())
+    amounts = convert_amounts(csv_rows, csv_file, fx_file)
+    for amount in amounts:
+        total_shared += amount
     half_share = total_shared / 2
 
     people.discard("Both")
@@ -57,8 +80,7 @@ def calculate_month_data(month, csv_file, contrib_file):
         people = {"PersonA", "PersonB"}  # fallback
 
     paid_by = {}
-    for row in csv_rows:
-        amount = float(row["Amount"].strip())
+    for row, amount in zip(csv_rows, amounts):
         payer = row["Paid By"].strip()
         if payer.lower() != "both":
             paid_by[payer] = paid_by.get(payer, 0.0) + amount
@@ -86,46 +108,135 @@ def calculate_month_data(month, csv_file, contrib_file):
         "total_shared": total_shared,
         "half_share": half_share,
         "csv_rows": csv_rows,
+        "amounts": amounts,
     }
 
 
-def plot_pie_chart(data, labels, title, out_path):
+def chart_path(stem, chart_options=None):
+    """
+    Returns the file name of a chart with the extension of the configured format.
+    """
+    options = {**DEFAULT_CHART_OPTIONS, **(chart_options or {})}
+    return f"{stem}.{options['format']}"
+
+
+def save_chart(out_path, chart_options=None):
+    """
+    Saves the current figure to out_path, using as few bytes as the chart options
+    allow: SVG, or PNG at the configured DPI, reduced to a color palette and
+    optimized. The written size is recorded in chart_sizes, together with the size
+    of a PNG with matplotlib's default settings as the baseline. For PNGs at the
+    default DPI that is the unquantized render itself; otherwise a default PNG is
+    rendered just to measure it.
+    """
+    options = {**DEFAULT_CHART_OPTIONS, **(chart_options or {})}
+    default_dpi = plt.rcParams["savefig.dpi"]
+    if default_dpi == "figure":
+        default_dpi = plt.gcf().dpi
+    default_size = None
+    out = io.BytesIO()
+    if options["format"] == "svg":
+        # Keep text as text instead of glyph outlines; fix the id salt and leave
+        # out the timestamp so unchanged charts produce identical files
+        with plt.rc_context({"svg.fonttype": "none", "svg.hashsalt": "charts"}):
+            plt.savefig(out, format="svg", metadata={"Date": None})
+    else:
+        plt.savefig(out, format="png", dpi=options["dpi"])
+        if options["dpi"] == default_dpi:
+            default_size = len(out.getvalue())
+        if options["colors"]:
+            out.seek(0)
+            image = Image.open(out).convert("RGB").quantize(colors=options["colors"])
+            quantized = io.BytesIO()
+            image.save(quantized, format="PNG", optimize=True)
+            if len(quantized.getvalue()) < len(out.getvalue()):
+                out = quantized
+    if default_size is None:
+        default_png = io.BytesIO()
+        plt.savefig(default_png, format="png")
+        default_size = len(default_png.getvalue())
+    Path(out_path).write_bytes(out.getvalue())
+    chart_sizes.append((str(out_path), default_size, len(out.getvalue())))
+
+
+def report_chart_sizes():
+    """
+    Prints how many bytes the charts saved since the last call take up, and how
+    many were saved compared to matplotlib's default PNG output.
+    """
+    if not chart_sizes:
+        return
+    default_total = sum(default for _, default, _ in chart_sizes)
+    written_total = sum(written for _, _, written in chart_sizes)
+    print(
+        f"📉 {len(chart_sizes)} charts written: {written_total} bytes, "
+        f"{default_total - written_total} bytes saved "
+        f"compared to {default_total} bytes of default PNGs"
+    )
+    chart_sizes.clear()
+
+
+def plot_pie_chart(data, labels, title, out_path, chart_options=None):
     plt.figure(figsize=(6, 6))
     colors = sns.color_palette("pastel")[0 : len(data)]
     plt.pie(data, labels=labels, autopct="%1.1f%%", colors=colors, startangle=140)
     plt.title(title)
     plt.tight_layout()
-    plt.savefig(out_path)
+    save_chart(out_path, chart_options)
     plt.close()
 
 
-def plot_bar_chart(categories, values, title, ylabel, out_path):
+def plot_bar_chart(categories, values, title, ylabel, out_path, chart_options=None):
     plt.figure(figsize=(8, 5))
     sns.barplot(x=categories, y=values, palette="pastel")
     plt.title(title)
     plt.ylabel(ylabel)
     plt.xticks(rotation=30, ha="right")
     plt.tight_layout()
-    plt.savefig(out_path)
+    save_chart(out_path, chart_options)
     plt.close()
 
 
-def generate_overview_report():
+def load_months_data(data_dir, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Reads every month's expenses and contributions file in data_dir concurrently,
+    using at most max_workers threads.
+    Returns a list of month data dicts (see calculate_month_data) sorted by month,
+    so the result is the same as reading the files one after another.
+    """
+    csv_files = sorted(
+        data_dir.glob("2[0-9][0-9][0-9]-[0-9][0-9].csv"), key=lambda p: p.stem
+    )
+
+    fx_file = data_dir / FX_RATES_FILE.name
+
+    def load(csv_file):
+        month = csv_file.stem
+        contrib_file = data_dir / f"{month}-contributions.csv"
+        return calculate_month_data(month, csv_file, contrib_file, fx_file)
+
+    if not max_workers or max_workers <= 1 or len(csv_files) <= 1:
+        return [load(csv_file) for csv_file in csv_files]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() yields results in input order, regardless of completion order
+        return list(executor.map(load, csv_files))
+
+
+def generate_overview_report(
+    max_workers=DEFAULT_MAX_WORKERS, chart_options=None, months_data=None
+):
     """
     Generates an overview report as a markdown table summarizing each month's
     account balance, per-person contributions, virtual contributions, and balances.
     Includes a total row at the end.
+    Month files are loaded concurrently with at most max_workers threads, unless
+    already loaded months_data (see load_months_data) is given.
     """
     overview_file = Path("reports/overview.md")
     overview_file.parent.mkdir(parents=True, exist_ok=True)
 
-    months_data = []
-    data_dir = Path("data")
-    for csv_file in data_dir.glob("2[0-9][0-9][0-9]-[0-9][0-9].csv"):
-        month = csv_file.stem
-        contrib_file = data_dir / f"{month}-contributions.csv"
-        month_data = calculate_month_data(month, csv_file, contrib_file)
-        months_data.append(month_data)
+    if months_data is None:
+        months_data = load_months_data(Path("data"), max_workers)
 
     # Calculate totals
     total_account_balance = 0.0
@@ -142,16 +253,14 @@ def generate_overview_report():
             total_balances[k] = total_balances.get(k, 0.0) + v
 
     # Calculate expenses by category across all months
+    # (reuses the rows loaded above instead of reading the files again)
     all_categories = {}
-    for csv_file in data_dir.glob("2[0-9][0-9][0-9]-[0-9][0-9].csv"):
-        with csv_file.open() as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                category = row.get("Category", "UncategorizedYes").strip()
-                amount = float(row["Amount"].strip())
-                if category not in all_categories:
-                    all_categories[category] = 0.0
-                all_categories[category] += amount
+    for data in months_data:
+        for row, amount in zip(data["csv_rows"], data["amounts"]):
+            category = row_category(row)
+            if category not in all_categories:
+                all_categories[category] = 0.0
+            all_categories[category] += amount
 
     with overview_file.open("w") as f:
         f.write("# Overview Report\n\n")
@@ -196,13 +305,14 @@ def generate_overview_report():
         for category, total in all_categories.items():
             f.write(f"- {category}: ${total:.2f}\n")
         # Pie chart for all time expenses by category
-        overview_pie_path = "overview-categories-pie.png"
+        overview_pie_path = chart_path("overview-categories-pie", chart_options)
         if all_categories:
             plot_pie_chart(
                 list(all_categories.values()),
                 list(all_categories.keys()),
                 "Expenses by Category (All Time)",
                 f"reports/{overview_pie_path}",
+                chart_options,
             )
             f.write(f"\n![Expenses by Category (All Time)]({overview_pie_path})\n")
 
@@ -226,7 +336,13 @@ def update_reports_readme():
             f.write(f"- [`{report.name}`]({report.name})\n")
 
 
-def generate_report(month):
+def generate_report(
+    month,
+    max_workers=DEFAULT_MAX_WORKERS,
+    update_overview=True,
+    chart_options=None,
+    month_data=None,
+):
     csv_file = Path(f"data/{month}.csv")
     contrib_file = Path(f"data/{month}-contributions.csv")
     report_file = Path(f"reports/{month}-report.md")
@@ -235,30 +351,32 @@ def generate_report(month):
         print(f"❌ CSV file not found: {csv_file}")
         sys.exit(1)
 
-    month_data = calculate_month_data(month, csv_file, contrib_file)
+    if month_data is None:
+        month_data = calculate_month_data(month, csv_file, contrib_file)
 
     report_file.parent.mkdir(parents=True, exist_ok=True)
 
     # Summarize totals per category
     categories = {}
-    for row in month_data["csv_rows"]:
-        category = row.get("Category", "UncategorizedYes").strip()
-        amount = float(row["Amount"].strip())
+    for row, amount in zip(month_data["csv_rows"], month_data["amounts"]):
+        category = row_category(row)
         if category not in categories:
             categories[category] = 0.0
         categories[category] += amount
 
     # Graphs
-    pie_path = f"reports/{month}-categories-pie.png"
+    pie_path = chart_path(f"reports/{month}-categories-pie", chart_options)
     if categories:
         plot_pie_chart(
             list(categories.values()),
             list(categories.keys()),
             f"Expenses by Category ({month})",
             pie_path,
+            chart_options,
         )
-    bar_path = f"reports/{month}-bar.png"
-    people = list(
+    bar_path = chart_path(f"reports/{month}-bar", chart_options)
+    # Sorted, so unchanged data produces an identical chart file
+    people = sorted(
         set(
             list(month_data["contributions"].keys())
             + list(month_data["virtual_contributions"].keys())
@@ -301,7 +419,7 @@ def generate_report(month):
     plt.ylabel("Amount ($)")
     plt.legend()
     plt.tight_layout()
-    plt.savefig(bar_path)
+    save_chart(bar_path, chart_options)
     plt.close()
 
     # Use only the basename for embedding in markdown
@@ -391,8 +509,10 @@ def generate_report(month):
             f.write("\n")
 
     print(f"✅ Report generated at: {report_file}")
-    generate_overview_report()
-    update_reports_readme()
+    if update_overview:
+        generate_overview_report(max_workers, chart_options)
+        update_reports_readme()
+        report_chart_sizes()
 
 
 def get_current_month():
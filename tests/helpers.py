@@ -0,0 +1,26 @@
+import csv
+
+
+def write_month(data_dir, month, rows):
+    """
+    Writes a month's expenses CSV file to data_dir, one expense on the first of
+    the month per (category, payer, amount) tuple in rows.
+    Returns the path of the written file.
+    """
+    file_path = data_dir / f"{month}.csv"
+    with open(file_path, "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["Date", "Category", "Paid By", "Amount", "Notes"]
+        )
+        writer.writeheader()
+        for category, payer, amount in rows:
+            writer.writerow(
+                {
+                    "Date": f"{month}-01",
+                    "Category": category,
+                    "Paid By": payer,
+                    "Amount": str(amount),
+                    "Notes": "",
+                }
+            )
+    return file_path
@@ -0,0 +1,263 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import os
+from unittest import mock
+from click.testing import CliRunner
+import click.testing
+from expense_tracker import generate_report
+from expense_tracker.cli import cli
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        # The CLI works on data/ and reports/ in the current directory
+        self.cwd = os.getcwd()
+        self.test_dir = tempfile.mkdtemp()
+        os.chdir(self.test_dir)
+        self.runner = CliRunner()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_batch_defers_report_until_end(self):
+        script = (
+            "# comments and empty lines are skipped\n"
+            "\n"
+            "add-expense --date 2025-06-01 --category Rent --paid-by Both "
+            '--amount 1000 --notes "June rent"\n'
+            "report 2025-06\n"
+            "add-contribution --date 2025-06-01 --name Alice --amount 600\n"
+            "report 2025-06\n"
+        )
+        result = self.runner.invoke(cli, ["batch"], input=script)
+        self.assertEqual(result.exit_code, 0, result.output)
+        # Both entries are added before the (single) report run
+        self.assertLess(
+            result.output.index("Contribution added"),
+            result.output.index("Report generated at: reports/2025-06-report.md"),
+        )
+        self.assertEqual(result.output.count("2025-06-report.md"), 1)
+        report = Path("reports/2025-06-report.md").read_text()
+        self.assertIn("| Alice | 600 |", report)
+        self.assertTrue(Path("reports/overview.md").exists())
+
+    def test_batch_loads_each_month_once(self):
+        script = (
+            "add-expense --date 2025-06-01 --paid-by Bob --amount 5 --notes a\n"
+            "add-expense --date 2025-07-01 --paid-by Bob --amount 5 --notes b\n"
+            "report 2025-06\n"
+            "report 2025-07\n"
+        )
+        with mock.patch.object(
+            generate_report,
+            "calculate_month_data",
+            wraps=generate_report.calculate_month_data,
+        ) as calculate:
+            result = self.runner.invoke(cli, ["batch"], input=script)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(
+            sorted(call.args[0] for call in calculate.call_args_list),
+            ["2025-06", "2025-07"],
+        )
+
+    def test_batch_keeps_chart_options_per_month(self):
+        script = (
+            "add-expense --date 2025-06-01 --paid-by Bob --amount 5 --notes a\n"
+            "add-expense --date 2025-07-01 --paid-by Bob --amount 5 --notes b\n"
+            "report 2025-06\n"
+            "report --chart-format svg 2025-07\n"
+        )
+        result = self.runner.invoke(cli, ["batch"], input=script)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(Path("reports/2025-06-bar.png").exists())
+        self.assertFalse(Path("reports/2025-06-bar.svg").exists())
+        self.assertIn(
+            "(2025-06-bar.png)", Path("reports/2025-06-report.md").read_text()
+        )
+        self.assertTrue(Path("reports/2025-07-bar.svg").exists())
+        self.assertFalse(Path("reports/2025-07-bar.png").exists())
+
+    def test_batch_stops_at_first_error(self):
+        script = (
+            "add-expense --date 2025-06-01 --paid-by Bob --amount 5\n"
+            "add-expense --date 2025-06-01 --paid-by Bob --amount 5 --notes ok\n"
+        )
+        result = self.runner.invoke(cli, ["batch"], input=script)
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("line 1: Missing option '--notes'", result.output)
+        self.assertFalse(Path("data/2025-06.csv").exists())
+
+    def test_batch_rejects_report_for_missing_month(self):
+        script = (
+            "add-expense --date 2025-06-01 --paid-by Bob --amount 5 --notes ok\n"
+            "report 2099-01\n"
+            "report 2025-06\n"
+        )
+        result = self.runner.invoke(cli, ["batch"], input=script)
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("line 2: CSV file not found: data/2099-01.csv", result.output)
+
+    def test_shell_ctrl_c_cancels_line(self):
+        self.runner.invoke(
+            cli,
+            ["add-expense", "--date", "2025-06-01", "--paid-by", "Bob"]
+            + ["--amount", "5", "--notes", "a"],
+        )
+        script = (
+            "report 2025-06\n"
+            "add-expense --date 2025-06-02 --paid-by Bob --amount 5 --notes b\n"
+        )
+        # Simulate a terminal, and Ctrl-C while the second line runs
+        with (
+            mock.patch.object(
+                click.testing._NamedTextIOWrapper, "isatty", return_value=True
+            ),
+            mock.patch(
+                "expense_tracker.cli.append_row_to_csv", side_effect=KeyboardInterrupt
+            ),
+        ):
+            result = self.runner.invoke(cli, ["shell"], input=script)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Cancelled.", result.output)
+        self.assertTrue(Path("reports/2025-06-report.md").exists())
+
+    def test_batch_cannot_be_nested(self):
+        result = self.runner.invoke(cli, ["batch"], input="shell\n")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("batch cannot be nested", result.output)
+
+
+class TestAddRows(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.test_dir = tempfile.mkdtemp()
+        os.chdir(self.test_dir)
+        Path("data").mkdir()
+        self.runner = CliRunner()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_currency_column_is_added_to_existing_file(self):
+        contrib_file = Path("data/2025-06-contributions.csv")
+        contrib_file.write_text(
+            "Date,Name,Amount,Virtual Contribution,Notes\n"
+            "2025-06-01,Alice,1000,No,Monthly contribution\n"
+        )
+        Path("data/fx-rates.csv").write_text("Date,Currency,Rate\n2025-01-01,EUR,1.1\n")
+        result = self.runner.invoke(
+            cli,
+            [
+                "add-contribution",
+                "--date",
+                "2025-06-20",
+                "--name",
+                "Bob",
+                "--amount",
+                "10",
+                "--currency",
+                "EUR",
+            ],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(
+            contrib_file.read_text().splitlines(),
+            [
+                "Date,Name,Amount,Virtual Contribution,Notes,Currency",
+                "2025-06-01,Alice,1000,No,Monthly contribution,",
+                "2025-06-20,Bob,10.0,No,,EUR",
+            ],
+        )
+
+    def test_rows_longer_than_header_are_not_rewritten(self):
+        # Header without the Virtual Contribution column, rows with it
+        contents = (
+            "Date,Name,Amount,Notes\n" "2025-06-01,Alice,1000,No,Monthly contribution\n"
+        )
+        contrib_file = Path("data/2025-06-contributions.csv")
+        contrib_file.write_text(contents)
+        Path("data/fx-rates.csv").write_text("Date,Currency,Rate\n2025-01-01,EUR,1.1\n")
+        result = self.runner.invoke(
+            cli,
+            [
+                "add-contribution",
+                "--date",
+                "2025-06-20",
+                "--name",
+                "Bob",
+                "--amount",
+                "10",
+                "--currency",
+                "EUR",
+            ],
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("line 2 has more fields than its header", result.output)
+        self.assertEqual(contrib_file.read_text(), contents)
+        self.assertEqual(list(Path("data").glob("*.tmp")), [])
+
+    def test_currency_without_fx_rate_is_refused(self):
+        Path("data/fx-rates.csv").write_text("Date,Currency,Rate\n2025-07-01,EUR,1.1\n")
+        result = self.runner.invoke(
+            cli,
+            [
+                "add-expense",
+                "--date",
+                "2025-06-02",
+                "--paid-by",
+                "Bob",
+                "--amount",
+                "10",
+                "--currency",
+                "EUR",
+                "--notes",
+                "x",
+            ],
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn(
+            "No FX rate for EUR on or before 2025-06-02 in data/fx-rates.csv",
+            result.output,
+        )
+        self.assertFalse(Path("data/2025-06.csv").exists())
+
+
+class TestCubeCommand(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.test_dir = tempfile.mkdtemp()
+        os.chdir(self.test_dir)
+        self.runner = CliRunner()
+        for month in ("2025-06", "2025-07"):
+            self.runner.invoke(
+                cli,
+                ["add-expense", "--date", f"{month}-01", "--category", "Rent"]
+                + ["--paid-by", "Both", "--amount", "100", "--notes", "x"],
+            )
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_chart_uses_month_filter(self):
+        with mock.patch("expense_tracker.cli.plot_trend_chart") as plot:
+            result = self.runner.invoke(
+                cli, ["cube", "--month", "2025-07", "--chart", "trend.svg"]
+            )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(plot.call_args.kwargs["months"], {"2025-07"})
+        self.assertEqual(plot.call_args.kwargs["chart_options"], {"format": "svg"})
+
+    def test_chart_rejects_unsupported_extension(self):
+        result = self.runner.invoke(cli, ["cube", "--chart", "trend.jpg"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("chart file must end in .png or .svg", result.output)
+        self.assertFalse(Path("trend.jpg").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
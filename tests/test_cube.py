@@ -0,0 +1,94 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import json
+from expense_tracker.cube import format_pivot, pivot, slice_cube, update_cube
+from helpers import write_month
+
+
+class TestCube(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.test_dir) / "data"
+        self.data_dir.mkdir()
+        self.cube_file = Path(self.test_dir) / "cube.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_month(self, month, rows):
+        return write_month(self.data_dir, month, rows)
+
+    def test_update_cube_aggregates_and_persists(self):
+        self.write_month(
+            "2025-06",
+            [
+                ("Dining Out", "Alice", 20),
+                ("Dining Out", "Alice", 30),
+                ("Rent", "Both", 1000),
+            ],
+        )
+        self.write_month("2025-07", [("Dining Out", "Bob", 45)])
+        cube = update_cube(self.data_dir, self.cube_file)
+        self.assertEqual(
+            cube["months"]["2025-06"]["cells"]["Dining Out"]["Alice"], 50.0
+        )
+        self.assertEqual(cube["months"]["2025-07"]["cells"]["Dining Out"]["Bob"], 45.0)
+        with self.cube_file.open() as f:
+            self.assertEqual(json.load(f), cube)
+
+    def test_update_cube_is_incremental(self):
+        self.write_month("2025-06", [("Rent", "Both", 1000)])
+        self.write_month("2025-07", [("Rent", "Both", 1000)])
+        update_cube(self.data_dir, self.cube_file)
+        # Tamper with a cached month: it is kept as long as its file is unchanged
+        cube = json.loads(self.cube_file.read_text())
+        cube["months"]["2025-06"]["cells"]["Rent"]["Both"] = 1.0
+        self.cube_file.write_text(json.dumps(cube))
+        self.write_month("2025-07", [("Rent", "Both", 1100)])
+        (self.data_dir / "2025-06.csv").touch()
+        cube = update_cube(self.data_dir, self.cube_file)
+        self.assertEqual(cube["months"]["2025-06"]["cells"]["Rent"]["Both"], 1.0)
+        self.assertEqual(cube["months"]["2025-07"]["cells"]["Rent"]["Both"], 1100.0)
+        # Removed months are dropped
+        (self.data_dir / "2025-06.csv").unlink()
+        cube = update_cube(self.data_dir, self.cube_file)
+        self.assertEqual(list(cube["months"]), ["2025-07"])
+
+    def test_slice_and_pivot(self):
+        self.write_month(
+            "2025-06", [("Dining Out", "Alice", 20), ("Groceries", "Bob", 80)]
+        )
+        self.write_month(
+            "2025-07", [("Dining Out", "Bob", 45), ("Dining Out", "Alice", 5)]
+        )
+        cube = update_cube(self.data_dir, self.cube_file)
+        records = slice_cube(cube, categories={"Dining Out"})
+        row_keys, column_keys, table = pivot(records, rows="month", columns="payer")
+        self.assertEqual(row_keys, ["2025-06", "2025-07"])
+        self.assertEqual(table["2025-06"], {"Alice": 20.0})
+        self.assertEqual(table["2025-07"], {"Bob": 45.0, "Alice": 5.0})
+
+        markdown = format_pivot(row_keys, column_keys, table, "month")
+        self.assertIn("| 2025-07 | 5.00 | 45.00 | 50.00 |", markdown)
+        self.assertIn("| **Total** | 25.00 | 45.00 | 70.00 |", markdown)
+        csv_out = format_pivot(row_keys, column_keys, table, "month", "csv")
+        self.assertEqual(csv_out.splitlines()[0], "Month,Alice,Bob,Total")
+        json_out = json.loads(
+            format_pivot(row_keys, column_keys, table, "month", "json")
+        )
+        self.assertEqual(json_out["2025-06"], {"Alice": 20.0, "Bob": 0.0})
+
+    def test_pivot_without_columns(self):
+        records = [
+            ("Rent", "2025-06", "Both", 1000.0),
+            ("Rent", "2025-07", "Both", 900.0),
+        ]
+        row_keys, column_keys, table = pivot(records, rows="category", columns=None)
+        self.assertEqual(column_keys, ["Amount"])
+        self.assertEqual(table["Rent"]["Amount"], 1900.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import os
+from expense_tracker import currency
+from expense_tracker.currency import convert_amounts, load_fx_rates, lookup_rate
+
+
+class TestCurrency(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.fx_file = Path(self.test_dir) / "fx-rates.csv"
+        # Deliberately unsorted: the index is sorted by date when loaded
+        self.fx_file.write_text(
+            "Date,Currency,Rate\n"
+            "2025-06-15,EUR,1.2\n"
+            "2025-01-01,EUR,1.1\n"
+            "2025-01-01,GBP,1.3\n"
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_lookup_uses_most_recent_rate(self):
+        fx_rates = load_fx_rates(self.fx_file)
+        self.assertEqual(fx_rates["EUR"][0], ["2025-01-01", "2025-06-15"])
+        self.assertEqual(lookup_rate(fx_rates, "EUR", "2025-06-14"), 1.1)
+        self.assertEqual(lookup_rate(fx_rates, "EUR", "2025-06-15"), 1.2)
+        self.assertEqual(lookup_rate(fx_rates, "EUR", "2026-01-01"), 1.2)
+        with self.assertRaises(ValueError):
+            lookup_rate(fx_rates, "EUR", "2024-12-31")
+        with self.assertRaises(ValueError):
+            lookup_rate(fx_rates, "JPY", "2025-06-01")
+
+    def test_convert_amounts(self):
+        rows = [
+            {"Date": "2025-06-01", "Amount": "100"},
+            {"Date": "2025-06-01", "Amount": "100", "Currency": ""},
+            {"Date": "2025-06-01", "Amount": "100", "Currency": "usd"},
+            {"Date": "2025-06-01", "Amount": "100", "Currency": "EUR"},
+            {"Date": "2025-06-20", "Amount": "100", "Currency": "eur"},
+            {"Date": "2025-06-20", "Amount": "10", "Currency": "GBP"},
+        ]
+        amounts = convert_amounts(rows, fx_file=self.fx_file)
+        for actual, expected in zip(amounts, [100, 100, 100, 110, 120, 13]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_missing_rate_names_source_and_line(self):
+        source = Path(self.test_dir) / "2025-06.csv"
+        source.write_text("")
+        rows = [
+            {"Date": "2025-06-01", "Amount": "1"},
+            {"Date": "2024-06-01", "Amount": "1", "Currency": "EUR"},
+        ]
+        with self.assertRaisesRegex(
+            ValueError, f"{source} line 3: No FX rate for EUR on or before 2024-06-01"
+        ):
+            convert_amounts(rows, source, self.fx_file)
+
+    def test_base_currency_needs_no_rates_file(self):
+        rows = [{"Date": "2025-06-01", "Amount": "42.5"}]
+        missing = Path(self.test_dir) / "missing.csv"
+        self.assertEqual(convert_amounts(rows, fx_file=missing), [42.5])
+
+    def test_caches_keep_one_entry_per_file(self):
+        source = Path(self.test_dir) / "2025-06.csv"
+        rows = [{"Date": "2025-06-01", "Amount": "100", "Currency": "EUR"}]
+        amounts_entries = len(currency._amounts_cache)
+        fx_entries = len(currency._fx_rates_cache)
+        for version in range(3):
+            source.write_text(f"version {version}")
+            self.fx_file.write_text(
+                f"Date,Currency,Rate\n2025-01-01,EUR,1.{version + 1}\n"
+            )
+            # Distinct mtimes, so each write is a new file version
+            os.utime(source, ns=(version, version))
+            os.utime(self.fx_file, ns=(version, version))
+            amounts = convert_amounts(rows, source, self.fx_file)
+            self.assertAlmostEqual(amounts[0], 100 * (1 + (version + 1) / 10))
+        self.assertEqual(len(currency._amounts_cache), amounts_entries + 1)
+        self.assertEqual(len(currency._fx_rates_cache), fx_entries + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
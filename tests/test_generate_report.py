@@ -3,7 +3,18 @@ from pathlib import Path
 import tempfile
 import shutil
 import csv
-from expense_tracker.generate_report import calculate_month_data
+from unittest import mock
+from PIL import Image
+from expense_tracker import generate_report
+from expense_tracker.generate_report import (
+    calculate_month_data,
+    chart_path,
+    chart_sizes,
+    load_months_data,
+    plot_pie_chart,
+    report_chart_sizes,
+)
+from helpers import write_month
 
 
 class TestCalculateMonthData(unittest.TestCase):
@@ -232,5 +243,98 @@ class TestCalculateMonthData(unittest.TestCase):
         )
 
 
+class TestLoadMonthsData(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_concurrent_matches_sequential(self):
+        for i, month in enumerate(["2025-03", "2024-12", "2025-01", "2025-02"]):
+            write_month(self.data_dir, month, [("Rent", "Alice", 100 + i)])
+        with mock.patch.object(
+            generate_report,
+            "ThreadPoolExecutor",
+            wraps=generate_report.ThreadPoolExecutor,
+        ) as executor:
+            sequential = load_months_data(self.data_dir, max_workers=1)
+            executor.assert_not_called()
+            concurrent = load_months_data(self.data_dir, max_workers=4)
+            executor.assert_called_once_with(max_workers=4)
+        self.assertEqual(
+            [d["month"] for d in sequential],
+            ["2024-12", "2025-01", "2025-02", "2025-03"],
+        )
+        self.assertEqual(sequential, concurrent)
+
+    def test_uses_fx_rates_from_data_dir(self):
+        with open(self.data_dir / "2025-06.csv", "w", newline="") as f:
+            f.write("Date,Category,Paid By,Amount,Currency,Notes\n")
+            f.write("2025-06-01,Dining Out,Alice,100,EUR,\n")
+        (self.data_dir / "fx-rates.csv").write_text(
+            "Date,Currency,Rate\n2025-01-01,EUR,1.5\n"
+        )
+        (month_data,) = load_months_data(self.data_dir)
+        self.assertAlmostEqual(month_data["total_shared"], 150.0)
+
+    def test_empty_data_dir(self):
+        self.assertEqual(load_months_data(self.data_dir), [])
+
+
+class TestChartOutput(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.out_dir = Path(self.test_dir)
+        chart_sizes.clear()
+
+    def tearDown(self):
+        chart_sizes.clear()
+        shutil.rmtree(self.test_dir)
+
+    def plot(self, chart_options):
+        out_path = self.out_dir / chart_path("pie", chart_options)
+        plot_pie_chart([1, 2, 3], ["A", "B", "C"], "Test", out_path, chart_options)
+        return out_path
+
+    def test_png_is_quantized(self):
+        out_path = self.plot({"colors": 16})
+        self.assertEqual(out_path.name, "pie.png")
+        with Image.open(out_path) as image:
+            self.assertEqual(image.mode, "P")
+        path, default_size, written_size = chart_sizes[0]
+        self.assertEqual(path, str(out_path))
+        self.assertEqual(written_size, out_path.stat().st_size)
+        self.assertLess(written_size, default_size)
+
+    def test_dpi(self):
+        out_path = self.plot({"dpi": 50, "colors": 0})
+        with Image.open(out_path) as image:
+            self.assertEqual(image.size, (300, 300))
+        # The baseline is a PNG at the default 100 DPI, i.e. four times the pixels
+        _, default_size, written_size = chart_sizes[0]
+        self.assertGreater(default_size, written_size)
+
+    def test_unquantized_default_png_is_the_baseline(self):
+        self.plot({"colors": 0})
+        _, default_size, written_size = chart_sizes[0]
+        self.assertEqual(default_size, written_size)
+
+    def test_svg_is_reproducible(self):
+        out_path = self.plot({"format": "svg"})
+        self.assertEqual(out_path.name, "pie.svg")
+        first = out_path.read_bytes()
+        self.assertIn(b"<svg", first)
+        self.plot({"format": "svg"})
+        self.assertEqual(out_path.read_bytes(), first)
+        self.assertGreater(chart_sizes[0][1], 0)
+
+    def test_report_chart_sizes_resets(self):
+        self.plot(None)
+        report_chart_sizes()
+        self.assertEqual(chart_sizes, [])
+
+
 if __name__ == "__main__":
     unittest.main()